@@ -1,3 +1,4 @@
+import sys
 import time
 import threading
 from pathlib import Path
@@ -6,9 +7,9 @@ def clear_screen():
     print("\033c", end="")
     # print("\033[H", end="") 
 
-def cursor_start():
-    # print("\033[H", end="") # Doesnt really clear full frames, if some part of the frame is out of the window (if you zoom in)
-    print("\033[H\033[3J", end="")
+# "\033[H" alone doesnt really clear full frames, if some part of the frame is out of the window (if you zoom in)
+CURSOR_START = "\033[H\033[3J"
+PROMPT = "\nPress <Enter> to end animation…"
 
 def intro_sequence(fps):
     FPS = fps  # frames per second
@@ -20,28 +21,50 @@ def intro_sequence(fps):
     with frame_file.open("r", encoding="utf-8") as f:
         frames = f.read().strip().split("\n\n")
 
+    # Encode every frame (with cursor reset and prompt) once up front, so each
+    # tick is a single write of ready-made bytes
+    frames = [(CURSOR_START + frame + PROMPT).encode("utf-8") for frame in frames]
+
     stop_flag = {"stop": False}
 
     def wait_for_enter():
-        input() # Due to cursor_start(), this gets cleared away.
+        input() # Due to CURSOR_START, this gets cleared away.
         stop_flag["stop"] = True
 
     threading.Thread(target=wait_for_enter, daemon=True).start()
 
-    cursor_start()
-    print(frames[0] + "\nPress <Enter> to end animation…", end="", flush=True)
+    sys.stdout.flush()  # push out anything printed before switching to raw bytes
+    write = sys.stdout.buffer.write
+    flush = sys.stdout.buffer.flush
+
+    # Sleep until fixed deadlines rather than a flat 1/FPS after each frame,
+    # so the time spent drawing doesn't slow the animation down
+    period = 1 / FPS
+    deadline = time.perf_counter()
+
+    def wait_for_next_frame():
+        nonlocal deadline
+        deadline += period
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            deadline -= delay  # running late: don't rush frames to catch up
+
+    write(frames[0])
+    flush()
     # print("\nPress <Enter> to end animation…\n") 
 
-    time.sleep(1 / FPS)
+    wait_for_next_frame()
 
     try:
         while not stop_flag["stop"]:
             for frame in frames[1:]:
                 if stop_flag["stop"]:
                     break
-                cursor_start()
-                print(frame + "\nPress <Enter> to end animation…", end="", flush=True)
-                time.sleep(1 / FPS)
+                write(frame)
+                flush()
+                wait_for_next_frame()
     except KeyboardInterrupt:
         pass
 
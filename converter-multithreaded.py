@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 """
 GIF-to-ASCII converter that keeps the GIF's aspect ratio.
-Optimized with multithreading and progress bar for large GIFs.
+Optimized with multiprocessing and progress bar for large GIFs.
 
 Requires:
-    pip install pillow pyperclip
+    pip install pillow pyperclip numpy
 """
 
 from pathlib import Path
 from PIL import Image
+import numpy as np
 import pyperclip
+import functools
+import hashlib
+import multiprocessing
+import os
+import queue
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Tuple
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
 
 # ───── CONFIG ─────
 HERE = Path(__file__).parent.resolve()
@@ -20,77 +28,114 @@ HERE = Path(__file__).parent.resolve()
 GIF_DIR   = HERE / "gifs"      # folder with your .gif files
 MAX_WIDTH = 130                # caps the ASCII art width (columns)
 CHAR_RATIO = 0.55              # roughly: char-height / char-width
-MAX_WORKERS = 4                # number of threads (adjust based on your CPU)
+MAX_WORKERS = os.cpu_count() or 4  # number of worker processes
+MAX_IN_FLIGHT = 2 * MAX_WORKERS    # frames queued for conversion at once
+DEDUP_FRAMES = 256             # recent unique frames kept for reuse by repeats
+REDUCING_GAP = 2               # pre-shrink frames to ≥ this × the target size
+RESAMPLE = Image.BILINEAR      # resize filter (BICUBIC is slower, no visible gain)
+COPY_TO_CLIPBOARD = True       # also copy the finished animation to the clipboard
 
 PALETTE = " .,:;+*?%$#@"       # darkest → lightest
 # PALETTE = " .,:;+*?%$#@"     # lightest → darkest
 # PALETTE = " .:-=+*#%@"
 
 LEVELS  = len(PALETTE) - 1
+# One character per possible 8-bit gray value, so no per-pixel math is needed
+PALETTE_CHARS = "".join(PALETTE[p * LEVELS // 255] for p in range(256))
+# ASCII palettes map gray bytes straight to output bytes; Unicode ones
+# (e.g. " ░▒▓█") are mapped as text and written as UTF-8
+PALETTE_TABLE = PALETTE_CHARS.encode("ascii") if PALETTE.isascii() else None
 
-# ───── LET USER PICK A GIF ─────
-gif_files = sorted(GIF_DIR.glob("*.gif"))
-if not gif_files:
-    sys.exit(f"❌ No .gif files found in {GIF_DIR}")
-
-print("Available GIFs")
-print("==============")
-for idx, path in enumerate(gif_files, 1):
-    print(f"{idx:>3}. {path.name}")
+# A frame as shipped to worker processes: (grayscale bytes, size, source box)
+FrameData = Tuple[bytes, Tuple[int, int], Tuple[float, float, float, float]]
 
-while True:
-    try:
-        choice = int(input(f"\nPick a GIF (1-{len(gif_files)}): "))
-        if 1 <= choice <= len(gif_files):
-            GIF_PATH = gif_files[choice - 1]
-            print(f"\n✅ Using {GIF_PATH.name}\n")
-            break
-        print("Number out of range, try again.")
-    except ValueError:
-        print("Please enter a valid number.")
+# ───── LET USER PICK A GIF ─────
+def pick_gif() -> Path:
+    """List the GIFs in GIF_DIR and return the one the user picks."""
+    gif_files = sorted(GIF_DIR.glob("*.gif"))
+    if not gif_files:
+        sys.exit(f"❌ No .gif files found in {GIF_DIR}")
+
+    print("Available GIFs")
+    print("==============")
+    for idx, path in enumerate(gif_files, 1):
+        print(f"{idx:>3}. {path.name}")
+
+    while True:
+        try:
+            choice = int(input(f"\nPick a GIF (1-{len(gif_files)}): "))
+            if 1 <= choice <= len(gif_files):
+                gif_path = gif_files[choice - 1]
+                print(f"\n✅ Using {gif_path.name}\n")
+                return gif_path
+            print("Number out of range, try again.")
+        except ValueError:
+            print("Please enter a valid number.")
 
 # ───── FRAME HANDLER ─────
-def extract_all_frames(gif_path: Path) -> List[Tuple[int, Image.Image]]:
-    """Extract all frames from GIF and return as list of (index, frame) tuples."""
-    frames = []
-    im = Image.open(gif_path)
-    
-    # Try to get total frame count first
-    try:
-        total_frames = im.n_frames
-        print(f"📊 GIF has {total_frames} frames")
-    except AttributeError:
-        print("📊 Counting frames...")
-        total_frames = None
-    
-    try:
+@functools.lru_cache(maxsize=16)
+def palette_levels(palette: bytes, transparency: Optional[int]) -> bytes:
+    """
+    Return a 256-byte table mapping palette indices to gray levels, using
+    Pillow's own L = R*299/1000 + G*587/1000 + B*114/1000 weights.
+    The transparent index maps to black.
+    """
+    levels = bytearray(256)
+    for idx in range(len(palette) // 3):
+        r, g, b = palette[idx * 3:idx * 3 + 3]
+        levels[idx] = (r * 19595 + g * 38470 + b * 7471 + 0x8000) >> 16
+    if transparency is not None:
+        levels[transparency] = 0
+    return bytes(levels)
+
+def to_grayscale(im: Image.Image) -> Image.Image:
+    """Convert a frame to grayscale, blending transparent pixels into black."""
+    # Palette frames (the first GIF frame) map their indices straight to gray
+    # levels, never expanding to RGBA (resizing in "P" mode would force NEAREST)
+    if im.mode == "P":
+        transparency = im.info.get("transparency")
+        if not isinstance(transparency, int):
+            transparency = None
+        levels = palette_levels(bytes(im.getpalette("RGB")), transparency)
+        return Image.frombytes("L", im.size, im.tobytes().translate(levels))
+
+    if im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info:
+        rgba = im.convert("RGBA")
+        black = Image.new("L", rgba.size, 0)
+        return Image.composite(rgba.convert("L"), black, rgba.getchannel("A"))
+    return im.convert("L")
+
+def iter_frames(gif_path: Path, target_w: int, target_h: int) -> Iterator[FrameData]:
+    """
+    Yield every frame of a GIF as (grayscale bytes, size, source box) tuples.
+    Frames are yielded one at a time as raw bytes, since GIF seeking is
+    sequential and PIL images pickle poorly between processes.
+    """
+    with Image.open(gif_path) as im:
+        # Box-reduce each frame by whole factors here, the same way
+        # resize(reducing_gap=REDUCING_GAP) does in converter.py; workers then
+        # resize the much smaller image over the matching source box
+        factor = (int(im.width / target_w / REDUCING_GAP) or 1,
+                  int(im.height / target_h / REDUCING_GAP) or 1)
+        if RESAMPLE == Image.NEAREST:
+            factor = (1, 1)
+        box = (0, 0, im.width / factor[0], im.height / factor[1])
+
         frame_idx = 0
-        while True:
-            print(f"\r🔍 Extracting frame {frame_idx + 1}" + 
-                  (f"/{total_frames}" if total_frames else ""), end="", flush=True)
-            
-            # Convert to RGBA first, then make a copy to avoid issues with threading
-            frame = im.convert("RGBA").copy()
-            frames.append((frame_idx, frame))
-            frame_idx += 1
-            
-            # Add a small delay every 50 frames to prevent hanging
-            if frame_idx % 50 == 0:
-                import time
-                time.sleep(0.01)
-            
-            im.seek(im.tell() + 1)
-    except EOFError:
-        pass
-    except Exception as e:
-        print(f"\n❌ Error extracting frame {frame_idx}: {e}")
-        if not frames:
-            raise
-    finally:
-        im.close()
-    
-    print(f"\n✅ Extracted {len(frames)} frames")
-    return frames
+        try:
+            while True:
+                frame = to_grayscale(im)
+                if factor != (1, 1):
+                    frame = frame.reduce(factor)
+                yield frame.tobytes(), frame.size, box
+                frame_idx += 1
+                im.seek(im.tell() + 1)
+        except EOFError:
+            pass
+        except Exception as e:
+            print(f"\n❌ Error extracting frame {frame_idx}: {e}")
+            if frame_idx == 0:
+                raise
 
 # ───── ASCII CONVERTER ─────
 def calc_target_size(orig_w: int, orig_h: int) -> Tuple[int, int]:
@@ -105,122 +150,185 @@ def calc_target_size(orig_w: int, orig_h: int) -> Tuple[int, int]:
     h = int(orig_h * scale * CHAR_RATIO)
     return max(1, w), max(1, h)
 
-def frame_to_ascii(frame_data: Tuple[int, Image.Image], target_w: int, target_h: int) -> Tuple[int, str]:
-    """
-    Resize an image and convert it to ASCII text.
-    Returns (frame_index, ascii_string) to maintain order.
-    """
-    frame_idx, img = frame_data
-    
-    # Resize and convert to grayscale
-    img = img.resize((target_w, target_h), Image.BICUBIC).convert("L")
-
-    ascii_lines = []
-    for y in range(img.height):
-        row = []
-        for x in range(img.width):
-            pixel = img.getpixel((x, y))
-            level = pixel * LEVELS // 255
-            row.append(PALETTE[int(level)])
-        ascii_lines.append("".join(row))
-
-    return frame_idx, "\n".join(ascii_lines)
-
-# ───── MAIN ─────
-print("🔍 Extracting frames from GIF...")
-
-# Check if GIF file exists and is readable
-if not GIF_PATH.exists():
-    sys.exit(f"❌ GIF file not found: {GIF_PATH}")
+def frame_to_ascii(frame_data: FrameData, target_w: int, target_h: int) -> bytes:
+    """Resize a grayscale frame and convert it to ASCII text (as UTF-8 bytes)."""
+    data, size, box = frame_data
+    img = Image.frombytes("L", size, data)
 
-try:
-    # Quick check if file is a valid image
-    with Image.open(GIF_PATH) as test_img:
-        print(f"📁 File size: {GIF_PATH.stat().st_size:,} bytes")
-        print(f"📐 Dimensions: {test_img.size[0]}x{test_img.size[1]}")
-        
-    # Extract all frames at once
-    all_frames = extract_all_frames(GIF_PATH)
-    total_frames = len(all_frames)
+    # Resize the already grayscale (and possibly pre-reduced) frame
+    img = img.resize((target_w, target_h), RESAMPLE, box=box)
 
-except Exception as e:
-    sys.exit(f"❌ Error reading GIF file: {e}")
+    if PALETTE_TABLE is None:
+        text = img.tobytes().decode("latin-1").translate(PALETTE_CHARS)
+        rows = (text[y:y + img.width] for y in range(0, len(text), img.width))
+        return "\n".join(rows).encode("utf-8")
 
-if not all_frames:
-    sys.exit("❌ No frames found in GIF.")
+    # Map every gray byte straight to its character in a single C-level pass
+    ascii_bytes = img.tobytes().translate(PALETTE_TABLE)
 
-print(f"📊 Found {total_frames} frame(s)")
+    # Append a newline column and emit the whole frame with one copy
+    chars = np.frombuffer(ascii_bytes, dtype=np.uint8).reshape(img.height, img.width)
+    newlines = np.full((img.height, 1), ord("\n"), dtype=np.uint8)
+    return np.concatenate((chars, newlines), axis=1).tobytes()[:-1]
 
-# Determine target size from first frame
-TARGET_W, TARGET_H = calc_target_size(*all_frames[0][1].size)
-print(f"🎯 Target ASCII size: {TARGET_W}x{TARGET_H} characters")
-
-# Process frames with multithreading and progress bar
-print(f"🔄 Converting frames to ASCII using {MAX_WORKERS} thread(s)...")
+def result_or_none(future: Future) -> Optional[bytes]:
+    """Return a conversion result, or None (after reporting it) if it failed."""
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"\n❌ Error processing frame: {e}")
+        return None
 
-ascii_results = {}
-completed_count = 0
+def decode_frames(gif_path: Path, target_w: int, target_h: int, frame_queue: queue.Queue):
+    """
+    Decode frames into frame_queue on a background thread.
+    Finishes with None, or with the exception if decoding failed.
+    """
+    try:
+        for frame_data in iter_frames(gif_path, target_w, target_h):
+            frame_queue.put(frame_data)
+        frame_queue.put(None)
+    except Exception as e:
+        frame_queue.put(e)
 
-def update_progress():
+def convert_frames(gif_path: Path, target_w: int, target_h: int) -> Iterator[Optional[bytes]]:
+    """
+    Convert every frame in worker processes and yield the ASCII frames in GIF order.
+    Decoding runs on its own thread so it keeps going while we wait on workers;
+    the bounded queue and window keep memory to about 2 × MAX_IN_FLIGHT frames.
+    Failed frames are yielded as None.
+
+    Many GIFs repeat frames (static scenes, loops), so each frame is hashed
+    and an exact repeat reuses the earlier conversion instead of a new task.
+    Only the DEDUP_FRAMES most recently seen frames are remembered, which adds
+    at most that many ASCII frames to memory however long the GIF is.
+    """
+    frame_queue = queue.Queue(maxsize=MAX_IN_FLIGHT)
+    threading.Thread(target=decode_frames, args=(gif_path, target_w, target_h, frame_queue),
+                     daemon=True).start()
+
+    # Workers start while the decoder thread is running, and forking a
+    # multi-threaded process can deadlock, so always spawn them
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=spawn) as executor:
+        pending = deque()
+        seen = OrderedDict()  # frame hash → future of its conversion, oldest first
+        while True:
+            frame_data = frame_queue.get()
+            if frame_data is None:
+                break
+            if isinstance(frame_data, Exception):
+                raise frame_data
+
+            key = hashlib.blake2b(frame_data[0], digest_size=16).digest()
+            future = seen.pop(key, None)
+            if future is None:
+                future = executor.submit(frame_to_ascii, frame_data, target_w, target_h)
+            seen[key] = future
+            if len(seen) > DEDUP_FRAMES:
+                seen.popitem(last=False)
+            pending.append(future)
+
+            # Hand back the oldest frame before submitting more
+            if len(pending) >= MAX_IN_FLIGHT:
+                yield result_or_none(pending.popleft())
+
+        while pending:
+            yield result_or_none(pending.popleft())
+
+def update_progress(completed: int, total: int):
     """Simple progress display without tqdm"""
-    global completed_count
-    completed_count += 1
-    percent = (completed_count / total_frames) * 100
+    percent = (completed / total) * 100
     bar_length = 30
-    filled_length = int(bar_length * completed_count // total_frames)
+    filled_length = int(bar_length * completed // total)
     bar = '█' * filled_length + '-' * (bar_length - filled_length)
-    print(f'\r🔄 Progress: |{bar}| {completed_count}/{total_frames} ({percent:.1f}%)', end='', flush=True)
-
-with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-    # Submit all frame conversion tasks
-    futures = [
-        executor.submit(frame_to_ascii, frame_data, TARGET_W, TARGET_H)
-        for frame_data in all_frames
-    ]
-    
-    # Process completed tasks with simple progress display
-    for future in as_completed(futures):
-        try:
-            frame_idx, ascii_frame = future.result()
-            ascii_results[frame_idx] = ascii_frame
-            update_progress()
-        except Exception as e:
-            print(f"\n❌ Error processing frame: {e}")
-            update_progress()
+    print(f'\r🔄 Progress: |{bar}| {completed}/{total} ({percent:.1f}%)', end='', flush=True)
+
+# ───── MAIN ─────
+def main():
+    gif_path = pick_gif()
 
-print()  # New line after progress bar
+    # Check if GIF file exists and is readable
+    if not gif_path.exists():
+        sys.exit(f"❌ GIF file not found: {gif_path}")
 
-# Sort frames by index to maintain original order
-ascii_frames = [ascii_results[i] for i in sorted(ascii_results.keys())]
+    try:
+        # Quick check if file is a valid image
+        with Image.open(gif_path) as test_img:
+            print(f"📁 File size: {gif_path.stat().st_size:,} bytes")
+            print(f"📐 Dimensions: {test_img.size[0]}x{test_img.size[1]}")
+            size = test_img.size
+            total_frames = getattr(test_img, "n_frames", 1)
+    except Exception as e:
+        sys.exit(f"❌ Error reading GIF file: {e}")
 
-print("✅ All frames converted!\n")
+    print(f"📊 Found {total_frames} frame(s)")
 
-# Quick preview
-print(f"[preview] {TARGET_W}x{TARGET_H} characters\n")
-preview_text = ascii_frames[0]
-print(preview_text[:min(500, len(preview_text))] + ("..." if len(preview_text) > 500 else "") + "\n")
+    # Determine target size from the GIF's canvas
+    target_w, target_h = calc_target_size(*size)
+    print(f"🎯 Target ASCII size: {target_w}x{target_h} characters")
 
-# Join frames & copy to clipboard
-print("📋 Preparing output...")
-full_output = f"\n\n".join(ascii_frames) + "\n"
+    print(f"🔄 Converting frames to ASCII using {MAX_WORKERS} process(es)...")
 
-print("📋 Copying to clipboard...")
-try:
-    pyperclip.copy(full_output)
-    print(f"✅ Copied {len(ascii_frames)} ASCII frame(s) "
-          f"({len(full_output):,} characters) to clipboard.")
-except Exception as e:
-    print(f"⚠️  Failed to copy to clipboard: {e}")
+    # ───── WRITE TO FILE ─────
+    output_file = HERE / "frames.txt"
+    temp_file = output_file.with_name(output_file.name + ".tmp")
 
-# ───── WRITE TO FILE ─────
-output_file = HERE / "frames.txt"
+    # Frames arrive in order and already encoded, so each one is written as
+    # soon as it is ready instead of keeping the whole animation in memory.
+    # They go to a temporary file that only replaces frames.txt once every
+    # frame is done, so a failed or interrupted run keeps the previous output.
+    preview_text = None
+    frame_count = 0
+    completed_count = 0
+
+    try:
+        with temp_file.open("wb") as f:
+            for ascii_frame in convert_frames(gif_path, target_w, target_h):
+                completed_count += 1
+                update_progress(completed_count, total_frames)
+                if ascii_frame is None:
+                    continue
+
+                if frame_count:
+                    f.write(b"\n\n")
+                else:
+                    preview_text = ascii_frame.decode("utf-8")
+                f.write(ascii_frame)
+                frame_count += 1
+            f.write(b"\n")
+        if frame_count:
+            os.replace(temp_file, output_file)
+    except Exception as e:
+        sys.exit(f"\n❌ Failed to convert {gif_path.name}: {e}")
+    finally:
+        temp_file.unlink(missing_ok=True)
+
+    if not frame_count:
+        sys.exit("\n❌ No frames found in GIF.")
+
+    print()  # New line after progress bar
+
+    print("✅ All frames converted!\n")
+
+    # Quick preview
+    print(f"[preview] {target_w}x{target_h} characters\n")
+    print(preview_text[:min(500, len(preview_text))] + ("..." if len(preview_text) > 500 else "") + "\n")
 
-print("💾 Saving to file...")
-try:
-    with output_file.open("w", encoding="utf-8") as f:
-        f.write(full_output)
     print(f"📝 Saved output to {output_file.name} ({output_file.stat().st_size:,} bytes)")
-except Exception as e:
-    print(f"❌ Failed to write to {output_file.name}: {e}")
 
-print("\n🎉 Processing complete!")
\ No newline at end of file
+    # ───── COPY TO CLIPBOARD ─────
+    if COPY_TO_CLIPBOARD:
+        print("📋 Copying to clipboard...")
+        try:
+            full_output = output_file.read_text(encoding="utf-8")
+            pyperclip.copy(full_output)
+            print(f"✅ Copied {frame_count} ASCII frame(s) "
+                  f"({len(full_output):,} characters) to clipboard.")
+        except Exception as e:
+            print(f"⚠️  Failed to copy to clipboard: {e}")
+
+    print("\n🎉 Processing complete!")
+
+if __name__ == "__main__":
+    main()
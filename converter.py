@@ -3,12 +3,15 @@
 GIF-to-ASCII converter that keeps the GIF's aspect ratio.
 
 Requires:
-    pip install pillow pyperclip
+    pip install pillow pyperclip numpy
 """
 
 from pathlib import Path
 from PIL import Image
+import numpy as np
 import pyperclip
+import functools
+import hashlib
 import sys
 
 # ───── CONFIG ─────
@@ -17,12 +20,20 @@ HERE = Path(__file__).parent.resolve()
 GIF_DIR   = HERE / "gifs"      # folder with your .gif files
 MAX_WIDTH = 130                # caps the ASCII art width (columns)
 CHAR_RATIO = 0.55              # roughly: char-height / char-width
+REDUCING_GAP = 2               # pre-shrink frames to ≥ this × the target size
+RESAMPLE = Image.BILINEAR      # resize filter (BICUBIC is slower, no visible gain)
+COPY_TO_CLIPBOARD = True       # also copy the finished animation to the clipboard
 
 PALETTE = " .,:;+*?%$#@"       # darkest → lightest
 # PALETTE = " .,:;+*?%$#@"     # lightest → darkest
 # PALETTE = " .:-=+*#%@"
 
 LEVELS  = len(PALETTE) - 1
+# One character per possible 8-bit gray value, so no per-pixel math is needed
+PALETTE_CHARS = "".join(PALETTE[p * LEVELS // 255] for p in range(256))
+# ASCII palettes map gray bytes straight to output bytes; Unicode ones
+# (e.g. " ░▒▓█") are mapped as text and written as UTF-8
+PALETTE_TABLE = PALETTE_CHARS.encode("ascii") if PALETTE.isascii() else None
 
 # ───── LET USER PICK A GIF ─────
 gif_files = sorted(GIF_DIR.glob("*.gif"))
@@ -46,15 +57,37 @@ while True:
         print("Please enter a valid number.")
 
 # ───── FRAME HANDLER ─────
-def gif_frames(gif_path):
-    """Yield every frame of a GIF as PIL RGBA images (transparency→black)."""
-    im = Image.open(gif_path)
-    try:
-        while True:
-            yield im.convert("RGBA")
-            im.seek(im.tell() + 1)
-    except EOFError:
-        return
+@functools.lru_cache(maxsize=16)
+def palette_levels(palette, transparency):
+    """
+    Return a 256-byte table mapping palette indices to gray levels, using
+    Pillow's own L = R*299/1000 + G*587/1000 + B*114/1000 weights.
+    The transparent index maps to black.
+    """
+    levels = bytearray(256)
+    for idx in range(len(palette) // 3):
+        r, g, b = palette[idx * 3:idx * 3 + 3]
+        levels[idx] = (r * 19595 + g * 38470 + b * 7471 + 0x8000) >> 16
+    if transparency is not None:
+        levels[transparency] = 0
+    return bytes(levels)
+
+def to_grayscale(im):
+    """Convert a frame to grayscale, blending transparent pixels into black."""
+    # Palette frames (the first GIF frame) map their indices straight to gray
+    # levels, never expanding to RGBA (resizing in "P" mode would force NEAREST)
+    if im.mode == "P":
+        transparency = im.info.get("transparency")
+        if not isinstance(transparency, int):
+            transparency = None
+        levels = palette_levels(bytes(im.getpalette("RGB")), transparency)
+        return Image.frombytes("L", im.size, im.tobytes().translate(levels))
+
+    if im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info:
+        rgba = im.convert("RGBA")
+        black = Image.new("L", rgba.size, 0)
+        return Image.composite(rgba.convert("L"), black, rgba.getchannel("A"))
+    return im.convert("L")
 
 # ───── ASCII CONVERTER ─────
 def calc_target_size(orig_w, orig_h):
@@ -70,42 +103,44 @@ def calc_target_size(orig_w, orig_h):
     return max(1, w), max(1, h)
 
 def frame_to_ascii(img, target_w, target_h):
-    """Resize an image and convert it to ASCII text."""
-    img = img.resize((target_w, target_h), Image.BICUBIC).convert("L")
+    """Resize a grayscale image and convert it to ASCII text (as UTF-8 bytes)."""
+    # reducing_gap box-reduces large frames by whole factors first, which is
+    # much cheaper than running the full resampling filter over every source pixel
+    img = img.resize((target_w, target_h), RESAMPLE, reducing_gap=REDUCING_GAP)
 
-    ascii_lines = []
-    for y in range(img.height):
-        row = []
-        for x in range(img.width):
-            pixel = img.getpixel((x, y))
-            level = pixel * LEVELS // 255
-            row.append(PALETTE[int(level)])
-        ascii_lines.append("".join(row))
+    if PALETTE_TABLE is None:
+        text = img.tobytes().decode("latin-1").translate(PALETTE_CHARS)
+        rows = (text[y:y + img.width] for y in range(0, len(text), img.width))
+        return "\n".join(rows).encode("utf-8")
 
-    return "\n".join(ascii_lines)
+    # Map every gray byte straight to its character in a single C-level pass
+    ascii_bytes = img.tobytes().translate(PALETTE_TABLE)
+
+    # Append a newline column and emit the whole frame with one copy
+    chars = np.frombuffer(ascii_bytes, dtype=np.uint8).reshape(img.height, img.width)
+    newlines = np.full((img.height, 1), ord("\n"), dtype=np.uint8)
+    return np.concatenate((chars, newlines), axis=1).tobytes()[:-1]
 
 # ───── MAIN ─────
-# Open once to get total frame count
-with Image.open(GIF_PATH) as im:
-    total_frames = getattr(im, "n_frames", None)
-    if total_frames is None:
-        total_frames = sum(1 for _ in gif_frames(GIF_PATH))
+ascii_frames = []
+seen = {}  # frame hash → ASCII, so repeated frames are only converted once
 
-print(f"🔄 Converting {total_frames} frame(s) to ASCII…")
+# Open once and decode every frame in a single pass
+with Image.open(GIF_PATH) as im:
+    total_frames = getattr(im, "n_frames", 1)
+    TARGET_W, TARGET_H = calc_target_size(*im.size)
 
-# Determine size once (first frame = safest)
-first_frame = next(gif_frames(GIF_PATH))
-TARGET_W, TARGET_H = calc_target_size(*first_frame.size)
+    print(f"🔄 Converting {total_frames} frame(s) to ASCII…")
 
-ascii_frames = []
-# Process first frame
-ascii_frames.append(frame_to_ascii(first_frame, TARGET_W, TARGET_H))
-print(f"  ✓ Frame 1/{total_frames}")
+    for idx in range(total_frames):
+        im.seek(idx)
+        frame = to_grayscale(im)
 
-# Process the rest
-for idx, frame in enumerate(gif_frames(GIF_PATH), start=2):
-    ascii_frames.append(frame_to_ascii(frame, TARGET_W, TARGET_H))
-    print(f"  ✓ Frame {idx}/{total_frames}")
+        key = hashlib.blake2b(frame.tobytes(), digest_size=16).digest()
+        if key not in seen:
+            seen[key] = frame_to_ascii(frame, TARGET_W, TARGET_H)
+        ascii_frames.append(seen[key])
+        print(f"  ✓ Frame {idx + 1}/{total_frames}")
 
 if not ascii_frames:
     sys.exit("❌ No frames found in GIF.")
@@ -114,21 +149,30 @@ print("✅ All frames converted!\n")
 
 # Quick preview
 print(f"[preview] {TARGET_W}x{TARGET_H} characters\n")
-print(ascii_frames[0][:120] + "...\n")
-
-# Join frames & copy to clipboard
-full_output = f"\n\n".join(ascii_frames) + "\n"
-pyperclip.copy(full_output)
-
-print(f"✅ Copied {len(ascii_frames)} ASCII frame(s) "
-      f"({len(full_output):,} characters) to clipboard.")
+print(ascii_frames[0].decode("utf-8")[:120] + "...\n")
 
 # ───── WRITE TO FILE ─────
 output_file = HERE / "frames.txt"
 
+# Write the already-encoded frames one by one instead of joining them into
+# one big string first
 try:
-    with output_file.open("w", encoding="utf-8") as f:
-        f.write(full_output)
+    with output_file.open("wb") as f:
+        for idx, frame in enumerate(ascii_frames):
+            if idx:
+                f.write(b"\n\n")
+            f.write(frame)
+        f.write(b"\n")
     print(f"📝 Saved output to {output_file.name} ({output_file.stat().st_size:,} bytes)")
 except Exception as e:
     print(f"❌ Failed to write to {output_file.name}: {e}")
+
+# ───── COPY TO CLIPBOARD ─────
+if COPY_TO_CLIPBOARD:
+    try:
+        full_output = (b"\n\n".join(ascii_frames) + b"\n").decode("utf-8")
+        pyperclip.copy(full_output)
+        print(f"✅ Copied {len(ascii_frames)} ASCII frame(s) "
+              f"({len(full_output):,} characters) to clipboard.")
+    except Exception as e:
+        print(f"⚠️  Failed to copy to clipboard: {e}")